@@ -9,35 +9,51 @@ const { authenticate, authorize } = require('../middleware/auth');
 module.exports = function (db) {
     const router = express.Router();
 
+    // Insert one CV event (and its alert, if suspicious); shared by single + batch ingest
+    const suspiciousTypes = ['hand_to_pocket', 'drawer_forced_open', 'drawer_opened_no_pos', 'suspicious_gesture', 'currency_anomaly'];
+    function ingestEvent(body) {
+        const { event_type, cashier_id, counter_id, confidence, risk_score, description, frame_path, region_data, linked_transaction_id } = body;
+
+        const id = uuidv4();
+        db.prepare(`
+      INSERT INTO camera_events (id, event_type, cashier_id, counter_id, confidence, risk_score, description, frame_path, region_data, linked_transaction_id)
+      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    `).run(id, event_type, cashier_id || null, counter_id || 'counter-1',
+            confidence || 0.5, risk_score || 0, description || null,
+            frame_path || null, region_data ? JSON.stringify(region_data) : null,
+            linked_transaction_id || null);
+
+        // Auto-create alerts for suspicious events
+        if (suspiciousTypes.includes(event_type)) {
+            const severity = risk_score >= 40 ? 'critical' : risk_score >= 25 ? 'high' : 'medium';
+            const alertId = uuidv4();
+            db.prepare(`
+        INSERT INTO alerts (id, source, severity, title, description, cashier_id, counter_id, camera_event_id, risk_score)
+        VALUES (?, 'camera', ?, ?, ?, ?, ?, ?, ?)
+      `).run(alertId, severity,
+                `🚨 ${event_type.replace(/_/g, ' ').toUpperCase()}`,
+                description || `Detected: ${event_type} at ${counter_id || 'counter-1'}`,
+                cashier_id || null, counter_id || 'counter-1', id, risk_score || 0);
+        }
+
+        return { id, event_type, alert_created: suspiciousTypes.includes(event_type) };
+    }
+    const ingestBatch = db.transaction((events) => events.map(ingestEvent));
+
     // ─── POST /api/camera/events — ingest CV event ───────
     router.post('/events', (req, res) => {
         try {
-            const { event_type, cashier_id, counter_id, confidence, risk_score, description, frame_path, region_data, linked_transaction_id } = req.body;
-
-            const id = uuidv4();
-            db.prepare(`
-        INSERT INTO camera_events (id, event_type, cashier_id, counter_id, confidence, risk_score, description, frame_path, region_data, linked_transaction_id)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-      `).run(id, event_type, cashier_id || null, counter_id || 'counter-1',
-                confidence || 0.5, risk_score || 0, description || null,
-                frame_path || null, region_data ? JSON.stringify(region_data) : null,
-                linked_transaction_id || null);
-
-            // Auto-create alerts for suspicious events
-            const suspiciousTypes = ['hand_to_pocket', 'drawer_forced_open', 'drawer_opened_no_pos', 'suspicious_gesture', 'currency_anomaly'];
-            if (suspiciousTypes.includes(event_type)) {
-                const severity = risk_score >= 40 ? 'critical' : risk_score >= 25 ? 'high' : 'medium';
-                const alertId = uuidv4();
-                db.prepare(`
-          INSERT INTO alerts (id, source, severity, title, description, cashier_id, counter_id, camera_event_id, risk_score)
-          VALUES (?, 'camera', ?, ?, ?, ?, ?, ?, ?)
-        `).run(alertId, severity,
-                    `🚨 ${event_type.replace(/_/g, ' ').toUpperCase()}`,
-                    description || `Detected: ${event_type} at ${counter_id || 'counter-1'}`,
-                    cashier_id || null, counter_id || 'counter-1', id, risk_score || 0);
-            }
+            res.status(201).json(ingestEvent(req.body));
+        } catch (err) {
+            res.status(500).json({ error: err.message });
+        }
+    });
 
-            res.status(201).json({ id, event_type, alert_created: suspiciousTypes.includes(event_type) });
+    // ─── POST /api/camera/events/batch — ingest many CV events in one transaction
+    router.post('/events/batch', (req, res) => {
+        try {
+            if (!Array.isArray(req.body)) return res.status(400).json({ error: 'Expected an array of events' });
+            res.status(201).json(ingestBatch(req.body));
         } catch (err) {
             res.status(500).json({ error: err.message });
         }
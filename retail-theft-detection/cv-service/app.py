@@ -3,9 +3,20 @@ import numpy as np
 import time
 import json
 import threading
+import queue
+import logging
+from logging.handlers import QueueHandler, QueueListener
 import requests
+from requests.adapters import HTTPAdapter
 import os
+import sys
+import itertools
+import glob
+import re
+import shutil
+import subprocess
 from collections import deque
+from functools import lru_cache
 from flask import Flask, Response, jsonify, request
 from detector import TheftDetector
 
@@ -19,72 +30,299 @@ def add_cors(response):
     response.headers['Access-Control-Allow-Methods'] = 'GET,POST,OPTIONS'
     return response
 
+# ─── Logging ───────────────────────────────────────────
+# Threads only enqueue records; a background listener does the blocking stdout write.
+_log_queue = queue.Queue(-1)
+_log_listener = QueueListener(_log_queue, logging.StreamHandler(sys.stdout))
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))   # else basicConfig adds LEVEL:name: prefixes
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
+_log_listener.start()
+log = logging.getLogger('cv-service')
+
 # ─── Configuration ─────────────────────────────────────
 BACKEND_URL = 'http://localhost:5000'
 BUFFER_SECONDS = 20
 FPS_FOR_BUFFER = 10
 MAX_BUFFER_SIZE = BUFFER_SECONDS * FPS_FOR_BUFFER
+EVENT_BATCH_SIZE = 16
+MAX_EVENT_HISTORY = 1000
+MJPEG_KEEPALIVE = 5.0   # seconds before an idle stream re-sends its last frame
+FFMPEG_BIN = shutil.which('ffmpeg')   # clips fall back to cv2.VideoWriter without it
+
+# Baseline (non-progressive, non-optimized Huffman) 4:2:0 JPEG — cheapest encode for live MJPEG
+JPEG_PARAMS = [
+    cv2.IMWRITE_JPEG_QUALITY, 72,
+    cv2.IMWRITE_JPEG_OPTIMIZE, 0,
+    cv2.IMWRITE_JPEG_PROGRESSIVE, 0,
+    cv2.IMWRITE_JPEG_SAMPLING_FACTOR, cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420,
+]
+
+# V4L2 is Linux-only; elsewhere let OpenCV pick (MSMF/DirectShow on Windows)
+CAMERA_BACKEND = cv2.CAP_V4L2 if sys.platform.startswith('linux') else cv2.CAP_ANY
+
+def open_camera(index):
+    """Open a camera that delivers compressed MJPG frames with a one-frame driver queue."""
+    cap = cv2.VideoCapture(index, CAMERA_BACKEND)
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))   # must precede size
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)   # drop stale frames instead of queueing them
+    return cap
+
+def _candidate_camera_indices():
+    """Indices worth probing: the real /dev/video* nodes on Linux, else 0-4."""
+    if CAMERA_BACKEND == cv2.CAP_V4L2:
+        return sorted(int(re.search(r'(\d+)$', p).group(1)) for p in glob.glob('/dev/video[0-9]*'))
+    return range(5)
 
 def find_working_camera():
     """Find the first available camera index."""
-    for i in range(5):
-        cap = cv2.VideoCapture(i)
+    for i in _candidate_camera_indices():
+        cap = open_camera(i)
         if cap.isOpened():
             ret, frame = cap.read()
             if ret:
                 cap.release()
-                print(f"[OK] Found working camera at index {i}")
+                log.info(f"[OK] Found working camera at index {i}")
                 return i
             cap.release()
     return None  # No camera found
 
-def make_offline_frame(message="Camera Offline"):
-    """Generate a blank 'camera offline' frame so MJPEG stream never blocks."""
-    frame = np.zeros((480, 640, 3), dtype=np.uint8)
-    frame[:] = (20, 20, 30)
-    cv2.putText(frame, message, (160, 220),
-        cv2.FONT_HERSHEY_SIMPLEX, 1.0, (80, 80, 100), 2)
-    cv2.putText(frame, time.strftime('%H:%M:%S'), (260, 270),
-        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (60, 60, 80), 1)
+_ts_cached = (-1, '', '')   # (epoch second, ISO timestamp, HH:MM:SS)
+
+def _cached_timestamps():
+    """Format the wall clock at most once per second."""
+    global _ts_cached
+    sec = int(time.time())
+    if sec != _ts_cached[0]:
+        t = time.localtime(sec)
+        _ts_cached = (sec, time.strftime('%Y-%m-%dT%H:%M:%S', t), time.strftime('%H:%M:%S', t))
+    return _ts_cached
+
+def now_iso():
+    return _cached_timestamps()[1]
+
+def now_hms():
+    return _cached_timestamps()[2]
+
+OFFLINE_BG_COLOR = (20, 20, 30)
+
+@lru_cache(maxsize=32)
+def render_text_tile(text, scale, color, thickness, bg):
+    """Rasterize a label once onto a solid `bg` tile.
+    Returns (tile, dx, dy) where (dx, dy) is the putText origin inside the tile."""
+    (w, h), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)
+    pad = thickness + 1
+    tile = np.empty((h + baseline + 2 * pad, w + 2 * pad, 3), dtype=np.uint8)
+    tile[:] = bg
+    cv2.putText(tile, text, (pad, pad + h), cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness)
+    return tile, pad, pad + h
+
+def blit_text(frame, text, org, scale, color, thickness, bg):
+    """Same pixels as cv2.putText(frame, text, org, ...) on a solid `bg` area, as one slice copy."""
+    tile, dx, dy = render_text_tile(text, scale, color, thickness, bg)
+    x0, y0 = org[0] - dx, org[1] - dy
+    th, tw = tile.shape[:2]
+    fh, fw = frame.shape[:2]
+    cx0, cy0 = max(x0, 0), max(y0, 0)
+    cx1, cy1 = min(x0 + tw, fw), min(y0 + th, fh)
+    if cx0 < cx1 and cy0 < cy1:
+        frame[cy0:cy1, cx0:cx1] = tile[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0]
+
+def _build_offline_bg():
+    """Render the parts of the offline frame that never change."""
+    frame = np.empty((480, 640, 3), dtype=np.uint8)
+    frame[:] = OFFLINE_BG_COLOR
     cv2.putText(frame, 'RetailGuard Monitoring', (170, 310),
         cv2.FONT_HERSHEY_SIMPLEX, 0.5, (50, 70, 100), 1)
     return frame
 
+_OFFLINE_BG = _build_offline_bg()
+# Two scratch slots, alternated per call, so the frame handed out last time
+# is never overwritten while a reader may still be encoding it.
+_offline_bufs = [np.empty_like(_OFFLINE_BG), np.empty_like(_OFFLINE_BG)]
+_offline_slot = 0
+
+def make_offline_frame(message="Camera Offline", detail=None):
+    """Generate a blank 'camera offline' frame so MJPEG stream never blocks.
+    `message` must be a fixed string (it goes through the tile cache); per-frame
+    text such as a counter goes in `detail`, which is drawn with plain putText.
+    The returned array is reused two calls later — copy it if you need to keep it."""
+    global _offline_slot
+    _offline_slot ^= 1
+    frame = _offline_bufs[_offline_slot]
+    np.copyto(frame, _OFFLINE_BG)
+    blit_text(frame, message, (160, 220), 1.0, (80, 80, 100), 2, OFFLINE_BG_COLOR)
+    cv2.putText(frame, now_hms(), (260, 270), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (60, 60, 80), 1)
+    if detail:
+        cv2.putText(frame, detail, (270, 340), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (60, 60, 80), 1)
+    return frame
+
+_MJPEG_HDR = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+_MJPEG_TAIL = b'\r\n'
+
+def mjpeg_part(jpeg):
+    """Wrap JPEG bytes as one complete multipart/x-mixed-replace part (None passes through)."""
+    return None if jpeg is None else _MJPEG_HDR + jpeg + _MJPEG_TAIL
+
+def encode_jpeg(frame):
+    """Encode a frame to JPEG bytes, or None if encoding fails."""
+    ret, buffer = cv2.imencode('.jpg', frame, JPEG_PARAMS)
+    return buffer.tobytes() if ret else None
+
 # ─── Global State ──────────────────────────────────────
-print("[INFO] Scanning for cameras...")
+log.info("[INFO] Scanning for cameras...")
 camera_index = find_working_camera()
 if camera_index is not None:
-    print(f"[INFO] Default camera_index: {camera_index}")
+    log.info(f"[INFO] Default camera_index: {camera_index}")
 else:
-    print("[WARN] No physical camera found. Will serve offline frames.")
+    log.warning("[WARN] No physical camera found. Will serve offline frames.")
 
 detector = TheftDetector()
 camera = None
+grabber = None                        # FrameGrabber reading `camera`
 is_running = False
-latest_frame = make_offline_frame()   # start with offline frame, not None
-detected_events = []
+# Two-slot frame ring: the producer fills the inactive slot, then flips _active,
+# so readers always see a complete frame without taking a lock.
+_frames = [make_offline_frame().copy(), None]   # start with offline frame, not None
+_active = 0
+raw_seq = 0                           # bumped under frame_cond on every publish
+frame_cond = threading.Condition()    # camera loop -> encoder thread
+latest_jpeg = encode_jpeg(_frames[0])   # newest JPEG, served by /api/cv/snapshot
+latest_part = mjpeg_part(latest_jpeg)   # same frame framed as a multipart part, shared by all MJPEG clients
+jpeg_cond = threading.Condition()     # encoder thread -> MJPEG clients
+frame_seq = 0                         # bumped under jpeg_cond on every encoded frame
+detected_events = deque(maxlen=MAX_EVENT_HISTORY)   # oldest evicted in O(1)
+total_event_count = 0
 events_lock = threading.Lock()
 
 frame_buffer = deque(maxlen=MAX_BUFFER_SIZE)
 buffer_lock = threading.Lock()
 camera_lock = threading.Lock()
 
+event_q = queue.Queue()           # events waiting to be POSTed to the backend
+session = requests.Session()      # keep-alive connections to the backend
+session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+
+def recent_events(limit):
+    """Return the newest `limit` events; caller must hold events_lock."""
+    start = max(0, len(detected_events) - limit)
+    return list(itertools.islice(detected_events, start, None))
+
+
+def current_frame():
+    """Latest published frame (annotated camera frame or offline placeholder)."""
+    return _frames[_active]
+
+
+def publish_frame(frame):
+    """Make a frame the current stream frame and hand it to the encoder thread."""
+    global _active, raw_seq
+    _frames[1 - _active] = frame
+    _active = 1 - _active
+    with frame_cond:
+        raw_seq += 1
+        frame_cond.notify()
+
+
+def encoder_loop():
+    """Encode the newest published frame to JPEG and wake all MJPEG clients.
+    Frames published faster than they can be encoded are skipped, so detection
+    FPS never waits on stream encoding."""
+    global latest_jpeg, latest_part, frame_seq
+    encoded_seq = raw_seq
+    while True:
+        with frame_cond:
+            frame_cond.wait_for(lambda: raw_seq != encoded_seq)
+            encoded_seq = raw_seq
+        jpeg = encode_jpeg(current_frame())
+        if jpeg is None:
+            continue
+        part = mjpeg_part(jpeg)   # built once here, not per client
+        with jpeg_cond:
+            latest_jpeg = jpeg
+            latest_part = part
+            frame_seq += 1
+            jpeg_cond.notify_all()
+
+
+threading.Thread(target=encoder_loop, daemon=True).start()
+
 
 def send_event_to_backend(event):
-    """Forward detected event to Node.js backend."""
-    def _send():
-        try:
-            should_record = event.get('risk_score', 0) >= 30 or event.get('event_type') in ('currency_anomaly', 'hand_to_pocket')
-            if should_record:
-                ts = int(time.time() * 1000)
-                clip_name = f'anomaly_{ts}.mp4'
-                threading.Thread(target=save_and_upload_clip, args=(clip_name, event.copy()), daemon=True).start()
+    """Queue a detected event for the backend dispatcher; never blocks the camera loop."""
+    should_record = event.get('risk_score', 0) >= 30 or event.get('event_type') in ('currency_anomaly', 'hand_to_pocket')
+    if should_record:
+        ts = int(time.time() * 1000)
+        clip_name = f'anomaly_{ts}.mp4'
+        threading.Thread(target=save_and_upload_clip, args=(clip_name, event.copy()), daemon=True).start()
+    event_q.put(event)
 
-            requests.post(f'{BACKEND_URL}/api/camera/events', json=event, timeout=3)
+
+def event_dispatch_loop():
+    """Drain queued events and forward them to the Node.js backend in small batches."""
+    while True:
+        batch = [event_q.get()]
+        while len(batch) < EVENT_BATCH_SIZE:
+            try:
+                batch.append(event_q.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            resp = session.post(f'{BACKEND_URL}/api/camera/events/batch', json=batch, timeout=5)
+            resp.raise_for_status()   # the backend commits a batch all-or-nothing
         except Exception as e:
-            print(f'[WARN] Could not send event: {e}')
+            log.warning('[WARN] Could not send %d event(s): %s', len(batch), e)
 
-    threading.Thread(target=_send, daemon=True).start()
+
+threading.Thread(target=event_dispatch_loop, daemon=True).start()
+
+
+def _write_clip_ffmpeg(path, frames):
+    """Pipe frames through ffmpeg/x264. Returns False if ffmpeg fails or exits early."""
+    h, w = frames[0].shape[:2]
+    try:
+        proc = subprocess.Popen([
+            FFMPEG_BIN, '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f'{w}x{h}', '-r', str(FPS_FOR_BUFFER), '-i', '-',
+            '-c:v', 'libx264', '-preset', 'ultrafast', '-tune', 'zerolatency',
+            '-pix_fmt', 'yuv420p',   # browsers can't play the 4:4:4 x264 would pick for bgr24
+            path,
+        ], stdin=subprocess.PIPE)
+    except OSError as e:
+        log.warning(f'[WARN] Could not start ffmpeg: {e}')
+        return False
+    ok = True
+    try:
+        for f in frames:
+            if f.shape == frames[0].shape:   # rawvideo has no per-frame size
+                proc.stdin.write(np.ascontiguousarray(f).data)
+    except OSError as e:   # includes BrokenPipeError when ffmpeg dies mid-clip
+        log.warning(f'[WARN] ffmpeg pipe closed early: {e}')
+        ok = False
+    finally:
+        try:
+            proc.stdin.close()
+        except OSError:
+            ok = False
+        returncode = proc.wait()   # always reap, even after a broken pipe
+    return ok and returncode == 0
+
+def write_clip(path, frames):
+    """Encode BGR frames to an mp4 — x264 via an ffmpeg pipe if available, else OpenCV mp4v."""
+    if FFMPEG_BIN and _write_clip_ffmpeg(path, frames):
+        return True
+
+    h, w = frames[0].shape[:2]
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), FPS_FOR_BUFFER, (w, h))
+    if not out.isOpened():
+        return False
+    for f in frames:
+        out.write(f)
+    out.release()
+    return True
 
 
 def save_and_upload_clip(filename, event):
@@ -96,76 +334,136 @@ def save_and_upload_clip(filename, event):
         if not frames:
             return
 
-        h, w = frames[0].shape[:2]
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(temp_path, fourcc, FPS_FOR_BUFFER, (w, h))
-        if not out.isOpened():
-            print(f'[WARN] Failed to open VideoWriter for {temp_path}')
+        if not write_clip(temp_path, frames):
+            log.warning(f'[WARN] Failed to encode clip {temp_path}')
             return
-
-        for f in frames:
-            out.write(f)
-        out.release()
-        print(f'📁 Saved clip: {filename}')
+        log.info(f'📁 Saved clip: {filename}')
 
         with open(temp_path, 'rb') as f:
             files = {'clip': (filename, f, 'video/mp4')}
             data = {'event_id': event.get('id'), 'filename': filename}
-            requests.post(f'{BACKEND_URL}/api/camera/clips', files=files, data=data, timeout=10)
-        print(f'🚀 Uploaded clip {filename}')
+            session.post(f'{BACKEND_URL}/api/camera/clips', files=files, data=data, timeout=10)
+        log.info(f'🚀 Uploaded clip {filename}')
         os.remove(temp_path)
     except Exception as e:
-        print(f'[WARN] Clip error: {e}')
+        log.warning(f'[WARN] Clip error: {e}')
         if 'temp_path' in locals() and os.path.exists(temp_path):
             try: os.remove(temp_path)
             except: pass
 
 
+class FrameGrabber(threading.Thread):
+    """Reads a VideoCapture on its own thread and keeps only the newest frame,
+    so capture never queues up behind detection and stale frames are dropped."""
+
+    def __init__(self, cap):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.frames = queue.Queue(maxsize=1)   # newest (ret, frame) only
+        self.stopping = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopping.is_set():
+                ret, frame = self.cap.read()
+                self._offer((ret, frame))
+                if not ret:
+                    time.sleep(0.1)   # don't spin on a dead device
+        finally:
+            self.cap.release()   # released here so it never happens mid-read()
+
+    def _offer(self, item):
+        """Put without blocking, evicting the unread older frame if there is one."""
+        try:
+            self.frames.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            self.frames.put_nowait(item)
+        except queue.Full:
+            pass
+
+    def read(self, timeout=1.0):
+        """Block for the next frame; (False, None) if none arrives in time."""
+        try:
+            return self.frames.get(timeout=timeout)
+        except queue.Empty:
+            return False, None
+
+    def stop(self):
+        """Ask the thread to exit; True if it did within the timeout.
+        The capture is released by run() on its way out."""
+        self.stopping.set()
+        self.join(timeout=2)
+        return not self.is_alive()
+
+
+def close_camera():
+    """Stop the grabber and release the device."""
+    global camera, grabber
+    with camera_lock:
+        if grabber:
+            if not grabber.stop():
+                log.warning('[WARN] Frame grabber still blocked in read(); it will release the camera when it returns')
+            grabber = None
+        elif camera:
+            camera.release()   # never handed to a grabber
+        camera = None
+
+
 def camera_loop():
     """Main camera capture loop — always running, reconnects if camera fails."""
-    global camera, is_running, latest_frame, frame_buffer, camera_index
+    global camera, grabber, is_running, frame_buffer, camera_index, total_event_count
 
     if camera_index is None:
-        print('[INFO] No camera available — streaming offline frames')
+        log.info('[INFO] No camera available — streaming offline frames')
         frame_num = 0
         while is_running:
-            latest_frame = make_offline_frame(f"No Camera — Frame {frame_num}")
+            publish_frame(make_offline_frame("No Camera", f"Frame {frame_num}"))
             frame_num += 1
             time.sleep(1.0 / 15)
         return
 
-    print(f'[INFO] Opening camera index {camera_index}')
+    log.info(f'[INFO] Opening camera index {camera_index}')
     consecutive_failures = 0
 
     while is_running:
         # Open (or reopen) camera
         with camera_lock:
             if camera is None or not camera.isOpened():
+                # Retire the old grabber first (inline: camera_lock is already held);
+                # its run() releases the dead capture on the way out.
+                if grabber:
+                    grabber.stop()
+                    grabber = None
+                elif camera:
+                    camera.release()
+                camera = None
                 cam_idx = find_working_camera()
-                if cam_idx is None:
-                    latest_frame = make_offline_frame("Camera Unavailable")
+                if cam_idx is not None:
+                    camera_index = cam_idx
+                    camera = open_camera(camera_index)
+                    if not camera.isOpened():
+                        camera.release()
+                        camera = None
+                if camera is None:
+                    publish_frame(make_offline_frame("Camera Unavailable"))
                     time.sleep(2)
                     continue
-                camera_index = cam_idx
-                camera = cv2.VideoCapture(camera_index)
-                camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-                print(f'[OK] Camera {camera_index} opened')
+                grabber = FrameGrabber(camera)
+                grabber.start()
+                log.info(f'[OK] Camera {camera_index} opened')
                 consecutive_failures = 0
 
-        with camera_lock:
-            ret, frame = camera.read()
+        ret, frame = grabber.read()
 
         if not ret:
             consecutive_failures += 1
-            print(f"[WARN] Frame read failed ({consecutive_failures})")
-            latest_frame = make_offline_frame("Camera Read Error")
+            log.warning('[WARN] Frame read failed (%d)', consecutive_failures)
+            publish_frame(make_offline_frame("Camera Read Error"))
             if consecutive_failures >= 5:
                 # Force reopen on next iteration
-                with camera_lock:
-                    if camera:
-                        camera.release()
-                        camera = None
+                close_camera()
                 consecutive_failures = 0
             time.sleep(0.5)
             continue
@@ -173,8 +471,8 @@ def camera_loop():
         consecutive_failures = 0
 
         # Process frame
-        annotated, events = detector.process_frame(frame)
-        latest_frame = annotated
+        annotated, events = detector.process_frame(frame, in_place=True)
+        publish_frame(annotated)
 
         # Buffer for clip recording
         loop_count = getattr(camera_loop, '_count', 0) + 1
@@ -186,37 +484,35 @@ def camera_loop():
         # Dispatch events
         if events:
             for event in events:
-                event['timestamp'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+                event['timestamp'] = now_iso()
                 with events_lock:
                     detected_events.append(event)
+                    total_event_count += 1
                 send_event_to_backend(event)
-                print(f'[EVENT] {event["event_type"]} risk={event["risk_score"]}')
+                log.info('[EVENT] %s risk=%s', event['event_type'], event['risk_score'])
 
         # Heartbeat
         if loop_count % 150 == 0:
-            print(f"[HEARTBEAT] Frame {loop_count}, events captured: {len(detected_events)}")
+            log.info('[HEARTBEAT] Frame %d, events captured: %d', loop_count, total_event_count)
 
-        time.sleep(0.01)
+    close_camera()
+    log.info('[INFO] Camera loop exited')
 
-    with camera_lock:
-        if camera:
-            camera.release()
-            camera = None
-    print('[INFO] Camera loop exited')
 
 
 def generate_mjpeg():
     """Generate MJPEG stream — never blocks, serves offline frame if needed."""
+    last_seq = -1
     while True:
-        frame = latest_frame
-        if frame is None:
-            frame = make_offline_frame()
-        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 72])
-        if ret:
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' +
-                   buffer.tobytes() + b'\r\n')
-        time.sleep(1.0 / 20)  # 20 FPS stream
+        # Sleep until a frame this client hasn't sent is published; an idle stream
+        # re-sends its last frame every MJPEG_KEEPALIVE seconds so dead clients get reaped.
+        with jpeg_cond:
+            jpeg_cond.wait_for(lambda: frame_seq != last_seq, timeout=MJPEG_KEEPALIVE)
+            last_seq = frame_seq
+            part = latest_part   # shared bytes, built once by encoder_loop
+        if part is not None:
+            # One yield per frame: Werkzeug's chunked encoding costs several writes per yield
+            yield part
 
 
 # ─── API Routes ────────────────────────────────────────
@@ -248,13 +544,13 @@ def video_feed():
 @app.route('/api/cv/status')
 def status():
     with events_lock:
-        recent = list(detected_events[-10:])
+        recent = recent_events(10)
     return jsonify({
         'running': is_running,
         'simulator': False,
         'frame_count': detector.frame_count,
         'recent_events': recent,
-        'total_events': len(detected_events),
+        'total_events': total_event_count,
         'expected_change': detector.expected_change,
         'optimal_notes': detector.optimal_notes,
         'picked_notes': detector.picked_notes,
@@ -278,16 +574,15 @@ def set_expected_change():
 def get_events():
     with events_lock:
         limit = request.args.get('limit', 50, type=int)
-        events_list = list(detected_events[-limit:])
+        events_list = recent_events(limit)
     return jsonify(events_list)
 
 
 @app.route('/api/cv/snapshot')
 def snapshot():
-    frame = latest_frame or make_offline_frame()
-    ret, buffer = cv2.imencode('.jpg', frame)
-    if ret:
-        return Response(buffer.tobytes(), mimetype='image/jpeg')
+    jpeg = latest_jpeg   # already encoded with JPEG_PARAMS by encoder_loop
+    if jpeg is not None:
+        return Response(jpeg, mimetype='image/jpeg')
     return jsonify({'error': 'Failed to encode'}), 500
 
 
@@ -302,5 +597,5 @@ if __name__ == '__main__':
     is_running = True
     t = threading.Thread(target=camera_loop, daemon=True)
     t.start()
-    print(f"🚀 CV Service starting on :5001  (camera={camera_index})")
+    log.info(f"🚀 CV Service starting on :5001  (camera={camera_index})")
     app.run(host='0.0.0.0', port=5001, debug=False, threaded=True)
@@ -5,53 +5,55 @@ import time
 import json
 import requests
 import random
+from requests.adapters import HTTPAdapter
 
 BACKEND_URL = 'http://localhost:5000'
 
+# Keep-alive connection pool reused across every simulated event
+_session = requests.Session()
+_session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
 
-def generate_event(event_type, cashier_id=None):
-    """Send a simulated camera event to the backend."""
-    events = {
-        'hand_to_pocket': {
-            'description': 'Simulated: Hand moved from drawer toward pocket area',
-            'confidence': round(0.6 + random.random() * 0.35, 2),
-            'risk_score': 35
-        },
-        'hand_hovering_drawer': {
-            'description': 'Simulated: Hand lingering in cash drawer zone',
-            'confidence': round(0.5 + random.random() * 0.4, 2),
-            'risk_score': 15
-        },
-        'drawer_opened_no_pos': {
-            'description': 'Simulated: Drawer opened without matching POS transaction',
-            'confidence': round(0.7 + random.random() * 0.25, 2),
-            'risk_score': 45
-        },
-        'drawer_forced_open': {
-            'description': 'Simulated: Drawer opened with excessive force',
-            'confidence': round(0.65 + random.random() * 0.3, 2),
-            'risk_score': 50
-        },
-        'suspicious_gesture': {
-            'description': 'Simulated: Unusual hand movement pattern detected',
-            'confidence': round(0.4 + random.random() * 0.4, 2),
-            'risk_score': 20
-        },
-        'normal': {
-            'description': 'Simulated: Normal cash handling observed',
-            'confidence': 0.95,
-            'risk_score': 0
-        }
+
+# Per-type payload template; confidence = base + random() * range
+_EVENT_TEMPLATES = {
+    'hand_to_pocket': {
+        'description': 'Simulated: Hand moved from drawer toward pocket area',
+        'confidence_base': 0.6, 'confidence_range': 0.35, 'risk_score': 35
+    },
+    'hand_hovering_drawer': {
+        'description': 'Simulated: Hand lingering in cash drawer zone',
+        'confidence_base': 0.5, 'confidence_range': 0.4, 'risk_score': 15
+    },
+    'drawer_opened_no_pos': {
+        'description': 'Simulated: Drawer opened without matching POS transaction',
+        'confidence_base': 0.7, 'confidence_range': 0.25, 'risk_score': 45
+    },
+    'drawer_forced_open': {
+        'description': 'Simulated: Drawer opened with excessive force',
+        'confidence_base': 0.65, 'confidence_range': 0.3, 'risk_score': 50
+    },
+    'suspicious_gesture': {
+        'description': 'Simulated: Unusual hand movement pattern detected',
+        'confidence_base': 0.4, 'confidence_range': 0.4, 'risk_score': 20
+    },
+    'normal': {
+        'description': 'Simulated: Normal cash handling observed',
+        'confidence_base': 0.95, 'confidence_range': 0.0, 'risk_score': 0
     }
+}
 
-    event_data = events.get(event_type, events['normal'])
+
+def generate_event(event_type, cashier_id=None):
+    """Send a simulated camera event to the backend."""
+    tpl = _EVENT_TEMPLATES.get(event_type, _EVENT_TEMPLATES['normal'])
+    confidence = round(tpl['confidence_base'] + random.random() * tpl['confidence_range'], 2)
 
     payload = {
         'event_type': event_type,
         'cashier_id': cashier_id,
-        'confidence': event_data['confidence'],
-        'risk_score': event_data['risk_score'] * event_data['confidence'],
-        'description': event_data['description'],
+        'confidence': confidence,
+        'risk_score': tpl['risk_score'] * confidence,
+        'description': tpl['description'],
         'region_data': {
             'hand_position': {'x': random.uniform(0.2, 0.8), 'y': random.uniform(0.3, 0.9)},
             'drawer_state': 'open' if 'drawer' in event_type else 'closed'
@@ -59,7 +61,7 @@ def generate_event(event_type, cashier_id=None):
     }
 
     try:
-        resp = requests.post(f'{BACKEND_URL}/api/camera/events', json=payload, timeout=3)
+        resp = _session.post(f'{BACKEND_URL}/api/camera/events', json=payload, timeout=3)
         result = resp.json()
         print(f'  ✅ Event sent: {event_type} (risk: {payload["risk_score"]:.1f}) — ID: {result.get("id", "?")}')
         return result
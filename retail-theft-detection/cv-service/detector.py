@@ -7,7 +7,12 @@ import cv2
 import numpy as np
 import time
 import json
-from collections import deque
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+log = logging.getLogger("detector")
 
 # Rupee symbol — kept as a constant to avoid backslash-escape issues in f-strings (Python <3.12)
 Rs = '\u20b9'
@@ -18,7 +23,17 @@ try:
     MP_AVAILABLE = True
 except (ImportError, AttributeError):
     MP_AVAILABLE = False
-    print("⚠️  MediaPipe not available — running in simulation mode")
+    log.warning("⚠️  MediaPipe not available — running in simulation mode")
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in so the kernels below run as plain Python."""
+        return lambda fn: fn
 
 
 # ─── INR Note Denomination Config ─────────────────────────────────────────────
@@ -35,17 +50,39 @@ NOTE_COLORS = {
     500: {'label': '₹500', 'hsv_lower': np.array([0, 0, 80]),     'hsv_upper': np.array([180, 40, 200]),  'bgr': (130, 130, 130)}, # Stone-grey
 }
 
+# Single-pass note matching: for each HSV channel, a 256-entry table giving the
+# bitmask of denominations (bit i = i-th NOTE_COLORS entry) whose range holds
+# that value. ANDing the three lookups gives every denomination a pixel matches.
+_NOTE_DENOMS = list(NOTE_COLORS)
+_NOTE_CHANNEL_LUTS = np.zeros((256, 1, 3), np.uint8)    # cv2.LUT layout, one column per channel
+for _bit, _cfg in enumerate(NOTE_COLORS.values()):
+    for _c in range(3):
+        _NOTE_CHANNEL_LUTS[_cfg['hsv_lower'][_c]:_cfg['hsv_upper'][_c] + 1, 0, _c] |= 1 << _bit
+# (64, n_denoms) 0/1 matrix: which denominations each bitmask value includes
+_NOTE_MASK_BITS = (np.arange(64)[:, None] >> np.arange(len(_NOTE_DENOMS))) & 1
 
-def greedy_change(amount, denominations=None):
+
+@njit(cache=True)
+def hand_geometry(lm, bounds):
     """
-    Compute the minimal set of INR notes to return as change.
-    Returns a list of note values in descending order.
-    Example: greedy_change(70) → [50, 20]
+    Per-hand geometry from a (21, 2) landmark array.
+    Returns (cx, cy, finger_spread, hits) where (cx, cy) is the centre of the
+    wrist, index and middle tips and hits[i] says whether it lies inside
+    bounds[i] = (x_min, x_max, y_min, y_max).
+    Scalar loops on purpose: JIT-compiled when numba is installed, and still
+    cheaper than small-array NumPy calls when it isn't.
     """
-    if denominations is None:
-        denominations = INR_NOTES
+    cx = (lm[0, 0] + lm[8, 0] + lm[12, 0]) / 3.0
+    cy = (lm[0, 1] + lm[8, 1] + lm[12, 1]) / 3.0
+    spread = abs(lm[8, 0] - lm[20, 0]) + abs(lm[8, 1] - lm[20, 1])
+    hits = np.zeros(bounds.shape[0], np.bool_)
+    for i in range(bounds.shape[0]):
+        hits[i] = bounds[i, 0] <= cx <= bounds[i, 1] and bounds[i, 2] <= cy <= bounds[i, 3]
+    return cx, cy, spread, hits
+
+
+def _greedy(remaining, denominations):
     result = []
-    remaining = int(round(amount))
     for note in sorted(denominations, reverse=True):
         while remaining >= note:
             result.append(note)
@@ -53,6 +90,23 @@ def greedy_change(amount, denominations=None):
     return result
 
 
+@lru_cache(maxsize=256)
+def _greedy_change_tuple(amount):
+    """greedy_change over INR_NOTES for an integer amount, memoized."""
+    return tuple(_greedy(amount, INR_NOTES))
+
+
+def greedy_change(amount, denominations=None):
+    """
+    Compute the minimal set of INR notes to return as change.
+    Returns a list of note values in descending order.
+    Example: greedy_change(70) → [50, 20]
+    """
+    if denominations is None:
+        return list(_greedy_change_tuple(int(round(amount))))
+    return _greedy(int(round(amount)), denominations)
+
+
 def is_note_needed(note_val, expected_change, picked_so_far):
     """
     Given what note was picked, determine if it's valid.
@@ -60,7 +114,6 @@ def is_note_needed(note_val, expected_change, picked_so_far):
     """
     optimal = greedy_change(expected_change)
     # Build expected count map
-    from collections import Counter
     optimal_counts = Counter(optimal)
     picked_counts = Counter(picked_so_far)
 
@@ -69,7 +122,7 @@ def is_note_needed(note_val, expected_change, picked_so_far):
     picked_count = picked_counts.get(note_val, 0)
 
     if needed_count == 0:
-        return False, f"₹{note_val} not needed; optimal change {greedy_change(expected_change)}"
+        return False, f"₹{note_val} not needed; optimal change {optimal}"
     if picked_count >= needed_count:
         return False, f"Already picked enough ₹{note_val} notes ({picked_count}/{needed_count})"
     return True, "ok"
@@ -83,16 +136,55 @@ class TheftDetector:
     """
 
     # Drawer region (configurable — default bottom-center of frame)
-    DRAWER_REGION = {'x_min': 0.25, 'x_max': 0.75, 'y_min': 0.6, 'y_max': 0.95}
+    # Zones are normalized (x_min, x_max, y_min, y_max) tuples
+    DRAWER_REGION = (0.25, 0.75, 0.6, 0.95)
 
     # Pocket regions (left/right sides)
     POCKET_REGIONS = [
-        {'x_min': 0.0,  'x_max': 0.30, 'y_min': 0.4, 'y_max': 0.9},
-        {'x_min': 0.70, 'x_max': 1.0,  'y_min': 0.4, 'y_max': 0.9},
+        (0.0,  0.30, 0.4, 0.9),
+        (0.70, 1.0,  0.4, 0.9),
     ]
 
-    def __init__(self):
-        self.hand_history = deque(maxlen=30)
+    BLOB_WORK_SIZE = (320, 240)  # (w, h) the skin-blob fallback runs at
+    SKIN_LOWER = np.array([0, 20, 70], dtype='uint8')
+    SKIN_UPPER = np.array([20, 255, 255], dtype='uint8')
+
+    MP_MAX_SIDE = 480            # longest side of the image MediaPipe sees
+
+    # Motion gate: MediaPipe is skipped while fewer than MOTION_MIN_PIXELS of a
+    # MOTION_SIZE grey thumbnail change by more than MOTION_DELTA, reusing the
+    # last landmarks for at most MAX_MOTION_SKIP frames in a row
+    MOTION_SIZE = (160, 120)
+    MOTION_DELTA = 15
+    MOTION_MIN_PIXELS = 50
+    MAX_MOTION_SKIP = 5
+
+    HISTORY_LEN = 30
+    RECENT_DRAWER_FRAMES = 25   # window for "pocket after drawer access"
+
+    # Same zones as one array: row 0 drawer, then pockets
+    _REGION_BOUNDS = np.array([DRAWER_REGION] + POCKET_REGIONS)
+
+    def __init__(self, max_num_hands=2, use_opencl=False):
+        """
+        max_num_hands: hands MediaPipe tracks at once. The default 2 covers both
+        of a cashier's hands (one at the drawer, one going to a pocket); 1 is
+        cheaper but misses that pattern.
+        use_opencl: run the skin-mask stage through OpenCV's T-API (UMat)
+        when an OpenCL device exists. Off by default — at the 320x240 working
+        size the upload/download can outweigh the gain, so measure first.
+        """
+        self.use_opencl = use_opencl and cv2.ocl.haveOpenCL()
+        if self.use_opencl:
+            cv2.ocl.setUseOpenCL(True)
+
+        # Hand history: ring of the last HISTORY_LEN centres and drawer flags,
+        # with running counts so the per-frame checks don't rescan it
+        self._hist_xy = np.zeros((self.HISTORY_LEN, 2))
+        self._hist_in = np.zeros(self.HISTORY_LEN, dtype=bool)
+        self._hist_n = 0                   # total pushes; next slot is _hist_n % HISTORY_LEN
+        self._drawer_count = 0             # in-drawer frames in the whole ring
+        self._recent_drawer_count = 0      # in-drawer frames in the last RECENT_DRAWER_FRAMES
         self.drawer_state = 'closed'
         self.drawer_open_start = None
         self.last_event_time = 0
@@ -107,19 +199,37 @@ class TheftDetector:
         self.picked_notes = []
         self.transaction_active = False
         self.optimal_notes = []        # computed from expected_change
+        self.optimal_counts = Counter()  # optimal_notes as {note: count}
+        self.picked_counts = Counter()   # picked_notes as {note: count}, kept in step
 
         # Hand tracking
         self.last_known_hands = {}
         self.next_hand_id = 0
 
+        # Motion gate state
+        self._prev_gray = None
+        self._motion_skips = 0
+        self._last_results = None
+
+        # Single worker that runs MediaPipe ahead of post-processing in process_batch
+        self._infer_pool = None
+
+        # Zone rectangles in pixels, keyed by frame (h, w)
+        self._region_px = {}
+
+        # Reused colour-conversion buffers (reallocated on size change)
+        self._rgb_buf = None
+        self._hsv_buf = None
+
         # MediaPipe
         if MP_AVAILABLE:
             self.mp_hands = mp.solutions.hands
             self.hands = self.mp_hands.Hands(
                 static_image_mode=False,
-                max_num_hands=2,
+                max_num_hands=max_num_hands,
+                model_complexity=0,              # lite landmark model
                 min_detection_confidence=0.5,
-                min_tracking_confidence=0.5
+                min_tracking_confidence=0.3      # keep tracking between palm detections
             )
             self.mp_draw = mp.solutions.drawing_utils
         else:
@@ -131,29 +241,73 @@ class TheftDetector:
         """Set the expected change amount for the current transaction."""
         self.expected_change = float(amount)
         self.picked_notes = []
+        self.picked_counts = Counter()
         self.transaction_active = amount > 0
         self.optimal_notes = greedy_change(amount)
-        print(f"💰 Detector: Expected change = ₹{amount}, optimal notes = {self.optimal_notes}")
+        self.optimal_counts = Counter(self.optimal_notes)
+        log.debug("💰 Detector: Expected change = ₹%s, optimal notes = %s", amount, self.optimal_notes)
 
     # ─── Helpers ─────────────────────────────────────────────────────────────
 
-    def _point_in_region(self, x, y, region):
-        return (region['x_min'] <= x <= region['x_max'] and
-                region['y_min'] <= y <= region['y_max'])
+    def _regions_contain(self, pts):
+        """(N, R) bool: point n lies in zone r, zones in _REGION_BOUNDS order (drawer, pockets...)."""
+        pts = np.asarray(pts, dtype=float).reshape(-1, 2)
+        b = self._REGION_BOUNDS
+        x, y = pts[:, 0:1], pts[:, 1:2]
+        return (b[:, 0] <= x) & (x <= b[:, 1]) & (b[:, 2] <= y) & (y <= b[:, 3])
+
+    @staticmethod
+    def _landmarks_xy(hand_landmarks):
+        """(21, 2) array of normalized landmark x, y."""
+        return np.fromiter((v for p in hand_landmarks.landmark for v in (p.x, p.y)),
+                           dtype=np.float64, count=42).reshape(21, 2)
+
+    def _push_history(self, x, y, in_drawer):
+        """Record one hand centre, keeping the running drawer counts in step."""
+        n = self._hist_n
+        if n >= self.RECENT_DRAWER_FRAMES:
+            self._recent_drawer_count -= int(self._hist_in[(n - self.RECENT_DRAWER_FRAMES) % self.HISTORY_LEN])
+        slot = n % self.HISTORY_LEN
+        if n >= self.HISTORY_LEN:
+            self._drawer_count -= int(self._hist_in[slot])
+        self._hist_xy[slot] = x, y
+        self._hist_in[slot] = in_drawer
+        self._drawer_count += in_drawer
+        self._recent_drawer_count += in_drawer
+        self._hist_n = n + 1
+
+    def _skin_mask(self, frame):
+        """Blurred skin-colour mask; on the OpenCL device when enabled."""
+        if self.use_opencl:
+            hsv = cv2.cvtColor(cv2.UMat(frame), cv2.COLOR_BGR2HSV)
+            mask = cv2.inRange(hsv, self.SKIN_LOWER, self.SKIN_UPPER)
+            return cv2.GaussianBlur(mask, (5, 5), 0).get()   # findContours is CPU-only
+        if self._hsv_buf is None or self._hsv_buf.shape != frame.shape:
+            self._hsv_buf = np.empty_like(frame)
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=self._hsv_buf)
+        mask = cv2.inRange(hsv, self.SKIN_LOWER, self.SKIN_UPPER)
+        return cv2.GaussianBlur(mask, (5, 5), 0)
 
     def _get_skin_blobs(self, frame):
-        """Detect skin-colored blobs as a hand fallback."""
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        lower = np.array([0, 20, 70], dtype='uint8')
-        upper = np.array([20, 255, 255], dtype='uint8')
-        mask = cv2.inRange(hsv, lower, upper)
-        mask = cv2.GaussianBlur(mask, (5, 5), 0)
+        """
+        Detect skin-colored blobs as a hand fallback.
+        Runs at BLOB_WORK_SIZE; centres are normalized, and the blob area
+        limits (500-15000 px at full size) are scaled to the working size.
+        """
+        full_h, full_w = frame.shape[:2]
+        w_s, h_s = self.BLOB_WORK_SIZE
+        if full_w * full_h > w_s * h_s:
+            frame = cv2.resize(frame, (w_s, h_s), interpolation=cv2.INTER_AREA)
+        h_f, w_f = frame.shape[:2]
+        scale = (w_f * h_f) / (full_w * full_h)
+        min_area, max_area = 500 * scale, 15000 * scale
+
+        mask = self._skin_mask(frame)
         contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         blobs = []
-        h_f, w_f = frame.shape[:2]
         for cnt in contours:
             area = cv2.contourArea(cnt)
-            if 500 < area < 15000:
+            if min_area < area < max_area:
                 M = cv2.moments(cnt)
                 if M['m00'] != 0:
                     cx = int(M['m10'] / M['m00']) / w_f
@@ -165,8 +319,11 @@ class TheftDetector:
         """
         Try to identify what denomination note is under the hand
         by sampling the HSV color in a region slightly below the hand center.
-        Returns (denomination: int or None, confidence: float)
+        Returns (denomination: int or None, confidence: float); (None, 0.0)
+        when no transaction is active.
         """
+        if not self.transaction_active:
+            return None, 0.0
         h_f, w_f = frame.shape[:2]
         # Sample region: a rectangle 15% width, 10% height, centered slightly below hand
         cx_px = int(hand_cx * w_f)
@@ -184,46 +341,68 @@ class TheftDetector:
             return None, 0.0
 
         hsv_region = cv2.cvtColor(region, cv2.COLOR_BGR2HSV)
-        best_match = None
-        best_score = 0
-
-        for denom, cfg in NOTE_COLORS.items():
-            mask = cv2.inRange(hsv_region, cfg['hsv_lower'], cfg['hsv_upper'])
-            score = np.sum(mask > 0) / max(mask.size, 1)
-            if score > best_score:
-                best_score = score
-                best_match = denom
+        h_bits, s_bits, v_bits = cv2.split(cv2.LUT(hsv_region, _NOTE_CHANNEL_LUTS))
+        matches = cv2.bitwise_and(cv2.bitwise_and(h_bits, s_bits), v_bits)
+        # Matching pixels per denomination, all in one pass over the crop
+        counts = np.bincount(matches.ravel(), minlength=64) @ _NOTE_MASK_BITS
+        best = int(np.argmax(counts))    # first wins on ties, as NOTE_COLORS order
+        best_score = counts[best] / matches.size
 
         # Only trust if at least 15% of pixels match
         if best_score > 0.15:
-            return best_match, min(0.5 + best_score, 0.95)
+            return _NOTE_DENOMS[best], min(0.5 + best_score, 0.95)
         return None, 0.0
 
+    def _to_rgb(self, frame):
+        """
+        Convert into the reused RGB buffer and mark it read-only for MediaPipe.
+        Frames larger than MP_MAX_SIDE are downscaled first; landmarks come
+        back normalized, so nothing downstream needs rescaling.
+        """
+        scale = self.MP_MAX_SIDE / max(frame.shape[:2])
+        if scale < 1.0:
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        if self._rgb_buf is None or self._rgb_buf.shape != frame.shape:
+            self._rgb_buf = np.empty_like(frame)
+        self._rgb_buf.flags.writeable = True
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+        self._rgb_buf.flags.writeable = False   # lets MediaPipe skip its own copy
+        return self._rgb_buf
+
+    def _region_pixels(self, h_f, w_f):
+        """
+        Pixel geometry of the zones for an (h, w) frame, computed once per size.
+        Returns (drawer_pt1, drawer_pt2, label_org, [(pocket_pt1, pocket_pt2), ...]).
+        """
+        px = self._region_px.get((h_f, w_f))
+        if px is None:
+            def corners(r):
+                x_min, x_max, y_min, y_max = r
+                return ((int(x_min * w_f), int(y_min * h_f)),
+                        (int(x_max * w_f), int(y_max * h_f)))
+            d1, d2 = corners(self.DRAWER_REGION)
+            px = (d1, d2, (d1[0] + 4, d1[1] + 16), [corners(p) for p in self.POCKET_REGIONS])
+            self._region_px[(h_f, w_f)] = px
+        return px
+
     def _draw_regions(self, frame):
         """Draw monitoring overlay on frame."""
-        h_f, w_f = frame.shape[:2]
+        d1, d2, label_org, pockets = self._region_pixels(*frame.shape[:2])
 
         # Drawer zone
-        d = self.DRAWER_REGION
-        cv2.rectangle(frame,
-            (int(d['x_min'] * w_f), int(d['y_min'] * h_f)),
-            (int(d['x_max'] * w_f), int(d['y_max'] * h_f)),
-            (100, 100, 100), 1)
-        cv2.putText(frame, 'DRAWER ZONE', (int(d['x_min'] * w_f) + 4, int(d['y_min'] * h_f) + 16),
+        cv2.rectangle(frame, d1, d2, (100, 100, 100), 1)
+        cv2.putText(frame, 'DRAWER ZONE', label_org,
             cv2.FONT_HERSHEY_SIMPLEX, 0.4, (120, 120, 120), 1)
 
         # Pocket zones
-        for p in self.POCKET_REGIONS:
-            cv2.rectangle(frame,
-                (int(p['x_min'] * w_f), int(p['y_min'] * h_f)),
-                (int(p['x_max'] * w_f), int(p['y_max'] * h_f)),
-                (60, 60, 140), 1)
+        for p1, p2 in pockets:
+            cv2.rectangle(frame, p1, p2, (60, 60, 140), 1)
 
         # Currency info overlay
         if self.transaction_active:
-            overlay = frame.copy()
-            cv2.rectangle(overlay, (4, 4), (360, 90), (0, 0, 0), -1)
-            cv2.addWeighted(overlay, 0.55, frame, 0.45, 0, frame)
+            # Darken just the HUD box (55% black) rather than blending a full-frame copy
+            hud = frame[4:91, 4:361]
+            hud[:] = cv2.addWeighted(hud, 0.45, hud, 0, 0)
             cv2.putText(frame, f'Change Due: {Rs}{self.expected_change:.0f}', (8, 22),
                 cv2.FONT_HERSHEY_SIMPLEX, 0.55, (0, 255, 100), 2)
             optimal_str = " + ".join([f"{Rs}{n}" for n in self.optimal_notes]) or "Exact"
@@ -252,14 +431,11 @@ class TheftDetector:
         if not self.transaction_active or self.expected_change <= 0:
             return []
 
-        from collections import Counter
         optimal = self.optimal_notes
-        optimal_counts = Counter(optimal)
-        picked_counts = Counter(self.picked_notes)
 
         # Check 1: Note is too large / not needed
-        needed = optimal_counts.get(picked_note, 0)
-        already_picked = picked_counts.get(picked_note, 0)
+        needed = self.optimal_counts.get(picked_note, 0)
+        already_picked = self.picked_counts.get(picked_note, 0)
 
         if needed == 0:
             alerts.append({
@@ -293,6 +469,7 @@ class TheftDetector:
             })
 
         self.picked_notes.append(picked_note)
+        self.picked_counts[picked_note] += 1
 
         # Check 2: Total picked now exceeds needed
         total_picked = sum(self.picked_notes)
@@ -328,31 +505,34 @@ class TheftDetector:
         """
         Classify hand gesture based on landmark positions.
         Now continuous — events are gated by cooldown timers, not one-shot flags.
+        Returns (events, (cx, cy), note_info) where note_info is the
+        (denomination, confidence) seen under a hand in the drawer, else None.
         """
-        wrist = hand_landmarks.landmark[0]
-        index_tip = hand_landmarks.landmark[8]
-        middle_tip = hand_landmarks.landmark[12]
-        pinky_tip = hand_landmarks.landmark[20]
-
-        cx = (wrist.x + index_tip.x + middle_tip.x) / 3
-        cy = (wrist.y + index_tip.y + middle_tip.y) / 3
+        cx, cy, finger_spread, hits = hand_geometry(
+            self._landmarks_xy(hand_landmarks), self._REGION_BOUNDS)
+        cx, cy = float(cx), float(cy)
 
         events = []
         now = time.time()
         global_cooldown_ok = (now - self.last_event_time) > self.event_cooldown
 
         # ── Drawer zone ──────────────────────────────────────────────────────
-        in_drawer = self._point_in_region(cx, cy, self.DRAWER_REGION)
-        self.hand_history.append({'x': cx, 'y': cy, 'time': now, 'in_drawer': in_drawer})
+        in_drawer = bool(hits[0])
+        self._push_history(cx, cy, in_drawer)
+        note_info = None
 
         if in_drawer:
+            # Note under the hand — used for pick validation and the on-frame badge,
+            # so only worth sampling while a transaction is open
+            if self.transaction_active:
+                note_info = self._classify_note_under_hand(frame, cx, cy)
+
             # Grabbing/pinching motion (fingers close together)
-            finger_spread = abs(index_tip.x - pinky_tip.x) + abs(index_tip.y - pinky_tip.y)
             is_grabbing = finger_spread < 0.07
 
             if is_grabbing and self.transaction_active and global_cooldown_ok:
                 # Try to classify what note is being picked
-                detected_denom, note_conf = self._classify_note_under_hand(frame, cx, cy)
+                detected_denom, note_conf = note_info
 
                 if detected_denom is not None:
                     currency_alerts = self._validate_note_pick(detected_denom)
@@ -361,11 +541,9 @@ class TheftDetector:
                 else:
                     # Simulation fallback when no color match
                     # Pick the next note from optimal list that hasn't been picked yet
-                    from collections import Counter
-                    picked_counts = Counter(self.picked_notes)
                     sim_note = None
                     for note in self.optimal_notes:
-                        if picked_counts.get(note, 0) < Counter(self.optimal_notes).get(note, 1):
+                        if self.picked_counts.get(note, 0) < self.optimal_counts.get(note, 1):
                             sim_note = note
                             break
                     if sim_note is None and self.optimal_notes:
@@ -376,7 +554,7 @@ class TheftDetector:
                         self.last_event_time = now
 
             # Hovering alert
-            drawer_frames = sum(1 for h in self.hand_history if h.get('in_drawer', False))
+            drawer_frames = self._drawer_count
             if drawer_frames > 20 and global_cooldown_ok:
                 events.append({
                     'event_type': 'hand_hovering_drawer',
@@ -388,24 +566,23 @@ class TheftDetector:
 
         # ── Pocket zone ──────────────────────────────────────────────────────
         pocket_cooldown_ok = (now - self.last_pocket_event_time) > self.event_cooldown
-        for region in self.POCKET_REGIONS:
-            if self._point_in_region(cx, cy, region) and pocket_cooldown_ok:
-                recent_drawer = any(h.get('in_drawer', False) for h in list(self.hand_history)[-25:])
-                risk = 85 if recent_drawer else 35
-                events.append({
-                    'event_type': 'hand_to_pocket',
-                    'confidence': 0.9,
-                    'risk_score': risk,
-                    'description': 'Hand entered pocket region' + (' after drawer access' if recent_drawer else '')
-                })
-                self.last_pocket_event_time = now
-                break  # only one pocket event per frame
+        if hits[1:].any() and pocket_cooldown_ok:
+            recent_drawer = self._recent_drawer_count > 0
+            risk = 85 if recent_drawer else 35
+            events.append({
+                'event_type': 'hand_to_pocket',
+                'confidence': 0.9,
+                'risk_score': risk,
+                'description': 'Hand entered pocket region' + (' after drawer access' if recent_drawer else '')
+            })
+            self.last_pocket_event_time = now
 
         # ── Rapid withdrawal ─────────────────────────────────────────────────
-        if len(self.hand_history) > 10 and global_cooldown_ok:
-            h_prev = list(self.hand_history)[-10]
-            if h_prev.get('in_drawer') and not in_drawer:
-                dist = np.sqrt((cx - h_prev['x'])**2 + (cy - h_prev['y'])**2)
+        if self._hist_n > 10 and global_cooldown_ok:
+            prev = (self._hist_n - 10) % self.HISTORY_LEN
+            if self._hist_in[prev] and not in_drawer:
+                px, py = self._hist_xy[prev]
+                dist = np.sqrt((cx - px)**2 + (cy - py)**2)
                 if dist > 0.35:
                     events.append({
                         'event_type': 'suspicious_gesture',
@@ -415,116 +592,153 @@ class TheftDetector:
                     })
                     self.last_event_time = now
 
-        return events, (cx, cy)
+        return events, (cx, cy), note_info
 
     # ─── Main Frame Processor ─────────────────────────────────────────────────
 
-    def process_frame(self, frame):
+    def process_frame(self, frame, in_place=False):
         """
         Process a single video frame continuously.
         Returns: (annotated_frame, detected_events)
         Detection never freezes — cooldown timers gate each event type independently.
+        With in_place=True the annotations are drawn onto `frame` itself (no
+        full-frame copy); use it when the caller doesn't need the clean frame.
+        """
+        return self._post_process(frame, self._infer_hands(frame), in_place)
+
+    def process_batch(self, frames, in_place=False):
         """
+        Process a sequence of frames (e.g. recorded footage) in order.
+        Returns a list of (annotated_frame, detected_events), one per frame.
+        MediaPipe runs on a worker thread ahead of the caller, so inference on
+        later frames overlaps gesture logic and drawing on earlier ones. Frame
+        order is preserved for both, as tracking and cooldowns depend on it.
+        """
+        if not (self.hands and MP_AVAILABLE):
+            return [self.process_frame(f, in_place) for f in frames]
+        if self._infer_pool is None:
+            self._infer_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='hands')
+        pending = [self._infer_pool.submit(self._infer_hands, f) for f in frames]
+        return [self._post_process(f, fut.result(), in_place) for f, fut in zip(frames, pending)]
+
+    def _infer_hands(self, frame):
+        """MediaPipe hand landmarks for a frame, or None without MediaPipe."""
+        if not (self.hands and MP_AVAILABLE):
+            return None
+        if (not self._has_motion(frame) and self._last_results is not None
+                and self._motion_skips < self.MAX_MOTION_SKIP):
+            # Nothing moved: the hands are where they were
+            self._motion_skips += 1
+            return self._last_results
+        self._motion_skips = 0
+        self._last_results = self.hands.process(self._to_rgb(frame))
+        return self._last_results
+
+    def _has_motion(self, frame):
+        """Cheap frame difference against a running average of recent frames."""
+        small = cv2.resize(frame, self.MOTION_SIZE, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        if self._prev_gray is None or self._prev_gray.shape != gray.shape:
+            self._prev_gray = gray
+            return True
+        _, moved = cv2.threshold(cv2.absdiff(gray, self._prev_gray), self.MOTION_DELTA, 1,
+                                 cv2.THRESH_BINARY)
+        cv2.addWeighted(self._prev_gray, 0.5, gray, 0.5, 0, dst=self._prev_gray)
+        return cv2.countNonZero(moved) >= self.MOTION_MIN_PIXELS
+
+    def _post_process(self, frame, results, in_place):
+        """Gesture/currency logic and drawing for a frame, given its MediaPipe results."""
         self.frame_count += 1
         events = []
-        annotated = frame.copy()
         now = time.time()
 
-        # 1. Draw monitoring zones
-        annotated = self._draw_regions(annotated)
-
-        # 2. Hand detection
+        # 1. Hand analysis — reads the clean frame, so nothing is drawn until it's done
         active_hands = []
+        hand_landmarks = []
+        badges = []    # (center, denom) for notes recognised under a hand
 
-        if self.hands and MP_AVAILABLE:
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.hands.process(rgb_frame)
-
+        if results is not None:
             if results.multi_hand_landmarks:
                 for idx, hl in enumerate(results.multi_hand_landmarks):
-                    self.mp_draw.draw_landmarks(annotated, hl, self.mp_hands.HAND_CONNECTIONS)
+                    hand_landmarks.append(hl)
                     handedness = 'Right'
                     if results.multi_handedness:
                         handedness = results.multi_handedness[idx].classification[0].label
-                    hand_events, center = self._classify_gesture(hl, handedness, frame)
+                    hand_events, center, note_info = self._classify_gesture(hl, handedness, frame)
                     events.extend(hand_events)
                     active_hands.append(center)
-                    # Draw detected note denomination badge on frame
-                    denom, conf = self._classify_note_under_hand(frame, center[0], center[1])
-                    if denom and conf > 0.2:
-                        h_f, w_f = annotated.shape[:2]
-                        cx_px = int(center[0] * w_f)
-                        cy_px = int(center[1] * h_f)
-                        ctx = NOTE_COLORS[denom]
-                        cv2.circle(annotated, (cx_px, cy_px), 22, ctx['bgr'], 2)
-                        cv2.putText(annotated, f"[{ctx['label']}]", (cx_px - 20, cy_px - 28),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, ctx['bgr'], 2)
+                    # Note denomination badge (drawer only), drawn below
+                    if note_info and note_info[0] and note_info[1] > 0.2:
+                        badges.append((center, note_info[0]))
             else:
                 # Fallback: skin blob detection
                 blobs = self._get_skin_blobs(frame)
-                for bx, by in blobs:
-                    active_hands.append((bx, by))
-                    pockets = self.POCKET_REGIONS
-                    pocket_ok = (now - self.last_pocket_event_time) > self.event_cooldown
-                    for region in pockets:
-                        if self._point_in_region(bx, by, region) and pocket_ok:
-                            events.append({
-                                'event_type': 'hand_to_pocket',
-                                'confidence': 0.72,
-                                'risk_score': 40,
-                                'description': 'Skin-colored object detected in pocket region'
-                            })
-                            self.last_pocket_event_time = now
-                            break
+                active_hands.extend(blobs)
+                pocket_ok = (now - self.last_pocket_event_time) > self.event_cooldown
+                if pocket_ok and self._regions_contain(blobs)[:, 1:].any():
+                    events.append({
+                        'event_type': 'hand_to_pocket',
+                        'confidence': 0.72,
+                        'risk_score': 40,
+                        'description': 'Skin-colored object detected in pocket region'
+                    })
+                    self.last_pocket_event_time = now
         else:
             # No MediaPipe at all — purely skin blobs
             blobs = self._get_skin_blobs(frame)
-            for bx, by in blobs:
-                active_hands.append((bx, by))
-                pocket_ok = (now - self.last_pocket_event_time) > self.event_cooldown
-                for region in self.POCKET_REGIONS:
-                    if self._point_in_region(bx, by, region) and pocket_ok:
-                        events.append({
-                            'event_type': 'hand_to_pocket',
-                            'confidence': 0.68,
-                            'risk_score': 35,
-                            'description': 'Hand/object detected in pocket zone (no MediaPipe)'
-                        })
-                        self.last_pocket_event_time = now
-                        break
+            active_hands.extend(blobs)
+            pocket_ok = (now - self.last_pocket_event_time) > self.event_cooldown
+            if pocket_ok and self._regions_contain(blobs)[:, 1:].any():
+                events.append({
+                    'event_type': 'hand_to_pocket',
+                    'confidence': 0.68,
+                    'risk_score': 35,
+                    'description': 'Hand/object detected in pocket zone (no MediaPipe)'
+                })
+                self.last_pocket_event_time = now
 
-        # Draw active hand centers
+        # 2. Draw monitoring zones, landmarks and note badges
+        annotated = frame if in_place else frame.copy()
+        self._draw_regions(annotated)
         h_f, w_f = annotated.shape[:2]
+        for hl in hand_landmarks:
+            self.mp_draw.draw_landmarks(annotated, hl, self.mp_hands.HAND_CONNECTIONS)
+        for (bx, by), denom in badges:
+            cx_px = int(bx * w_f)
+            cy_px = int(by * h_f)
+            ctx = NOTE_COLORS[denom]
+            cv2.circle(annotated, (cx_px, cy_px), 22, ctx['bgr'], 2)
+            cv2.putText(annotated, f"[{ctx['label']}]", (cx_px - 20, cy_px - 28),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, ctx['bgr'], 2)
+
+        # Draw active hand centers
         for bx, by in active_hands:
             cv2.circle(annotated, (int(bx * w_f), int(by * h_f)), 5, (0, 255, 255), -1)
 
         # ─── Hand disappearance (pocket hiding) ───────────────────────────
+        # close[i, j]: known hand i is within 0.12 of active hand j
+        known_ids = list(self.last_known_hands)
+        known_pos = np.array([self.last_known_hands[i]['pos'] for i in known_ids]).reshape(-1, 2)
+        active_pos = np.array(active_hands, dtype=float).reshape(-1, 2)
+        close = np.linalg.norm(known_pos[:, None, :] - active_pos[None, :, :], axis=2) < 0.12
+
         pocket_ok = (now - self.last_pocket_event_time) > self.event_cooldown
-        for h_id, h_data in list(self.last_known_hands.items()):
-            found = any(
-                np.sqrt((c[0] - h_data['pos'][0])**2 + (c[1] - h_data['pos'][1])**2) < 0.12
-                for c in active_hands
-            )
-            if not found:
-                for p in self.POCKET_REGIONS:
-                    if self._point_in_region(h_data['pos'][0], h_data['pos'][1], p) and pocket_ok:
-                        events.append({
-                            'event_type': 'hand_to_pocket',
-                            'confidence': 0.95,
-                            'risk_score': 90,
-                            'description': 'Hand disappeared inside pocket region — possible theft!'
-                        })
-                        self.last_pocket_event_time = now
-                del self.last_known_hands[h_id]
-
-        # Update tracking
+        vanished_in_pocket = ~close.any(axis=1) & self._regions_contain(known_pos)[:, 1:].any(axis=1)
+        if pocket_ok:
+            for _ in range(np.count_nonzero(vanished_in_pocket)):   # one alert per vanished hand
+                events.append({
+                    'event_type': 'hand_to_pocket',
+                    'confidence': 0.95,
+                    'risk_score': 90,
+                    'description': 'Hand disappeared inside pocket region — possible theft!'
+                })
+                self.last_pocket_event_time = now
+
+        # Update tracking — each active hand takes the first known hand close to it
         new_known = {}
-        for c in active_hands:
-            matched_id = None
-            for h_id, h_data in self.last_known_hands.items():
-                if np.sqrt((c[0] - h_data['pos'][0])**2 + (c[1] - h_data['pos'][1])**2) < 0.12:
-                    matched_id = h_id
-                    break
+        for j, c in enumerate(active_hands):
+            rows = np.flatnonzero(close[:, j])
+            matched_id = known_ids[rows[0]] if rows.size else None
             key = matched_id if matched_id is not None else self.next_hand_id
             new_known[key] = {'pos': c, 'time': now}
             if matched_id is None:
@@ -546,5 +760,13 @@ class TheftDetector:
 
     def cleanup(self):
         """Release resources."""
+        if self._infer_pool is not None:
+            self._infer_pool.shutdown(wait=True)
+            self._infer_pool = None
         if self.hands and MP_AVAILABLE:
             self.hands.close()
+
+
+if NUMBA_AVAILABLE:
+    # Compile the kernel at import, not on the camera thread when the first hand shows up
+    hand_geometry(np.zeros((21, 2)), TheftDetector._REGION_BOUNDS)
@@ -1,16 +1,26 @@
 import cv2
+from concurrent.futures import ThreadPoolExecutor
+
+def _probe(i):
+    """Returns (opened, frame_read) for camera index i."""
+    cap = cv2.VideoCapture(i)
+    try:
+        if not cap.isOpened():
+            return False, False
+        ret, _ = cap.read()
+        return True, ret
+    finally:
+        cap.release()
 
 def test_cameras():
-    for i in range(5):
-        cap = cv2.VideoCapture(i)
-        if cap.isOpened():
-            ret, frame = cap.read()
-            if ret:
-                print(f"✅ Camera found at index {i}")
-                cap.release()
-                return i
-            cap.release()
-        else:
+    # Absent devices can each block for a second or two, so probe them all at once
+    with ThreadPoolExecutor(max_workers=5) as ex:
+        results = list(ex.map(_probe, range(5)))
+    for i, (opened, ret) in enumerate(results):
+        if ret:
+            print(f"✅ Camera found at index {i}")
+            return i
+        if not opened:
             print(f"❌ No camera at index {i}")
     return None
 